@@ -1,19 +1,27 @@
 #!/usr/bin/env python3
 """JARVIS Connector Service"""
-import time
+import signal
+import sys
+import threading
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _handle_sigterm(signum, frame):
+    logger.info("JARVIS Connector Service stopping...")
+    sys.exit(0)
+
 def main():
     logger.info("JARVIS Connector Service starting...")
+    signal.signal(signal.SIGTERM, _handle_sigterm)
     
     try:
-        # Keep the service running
-        while True:
-            logger.info("JARVIS Connector Service running")
-            time.sleep(30)  # Wait 30 seconds before next log
+        # Keep the service running without waking up until a signal arrives
+        if hasattr(signal, "pause"):
+            signal.pause()
+        else:
+            threading.Event().wait()
     except KeyboardInterrupt:
         logger.info("JARVIS Connector Service stopping...")
     except Exception as e:
@@ -1,24 +1,53 @@
 #!/usr/bin/env python3
 """JARVIS Core Service with German Conversation Capabilities"""
-from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Depends
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Depends, Header
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import uvicorn
 import asyncio
 import json
+import orjson
+import msgspec
 import io
 import base64
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple, AsyncIterator
 import logging
 from datetime import datetime
-import uuid
+import functools
+import hashlib
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
+import re
+import shutil
+import struct
 import sys
+import wave
+from cachetools import LRUCache, TTLCache
+from uuid6 import uuid7
+
+from jarvis_core.limits import available_cpus, worker_count
 
 # Add shared module to path
 sys.path.append('/app/shared')
-from azure_ai_service import AzureAIService, process_idea_with_azure_ai, validate_azure_ai_config
+from azure_ai_service import AzureAIService, process_idea_with_azure_ai, validate_azure_ai_config, close_session as close_azure_session
+
+# Shared state backend for multi-worker deployments
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    logging.warning("Redis library not available, state stays per-process")
+    
+    class RedisError(Exception):
+        pass
+
+# On-disk TTS cache shared by all worker processes
+try:
+    from diskcache import Cache
+except ImportError:
+    logging.warning("diskcache not available, TTS cache stays per-process")
+    Cache = None
 
 # Database connection imports
 try:
@@ -27,17 +56,27 @@ try:
 except ImportError:
     logging.warning("PostgreSQL libraries not available")
 
-# German language processing imports
+# Audio decoding for transcription and the spectrum endpoint; the speech model libraries are
+# imported in GermanConversationEngine.initialize_engines
 try:
-    import speech_recognition as sr
-    import pyttsx3
-    import pyaudio
-    import wave
     import numpy as np
-    from langdetect import detect
-    import openai
 except ImportError:
-    logging.warning("Speech processing libraries not fully available")
+    logging.warning("NumPy not available, audio processing disabled")
+    np = None
+
+try:
+    import soundfile as sf
+    from scipy.signal import resample_poly
+except ImportError:
+    logging.warning("Audio processing libraries not fully available")
+
+try:
+    from numba import njit
+except ImportError:
+    logging.warning("Numba not available, spectrum kernels run as plain Python")
+
+    def njit(*args, **kwargs):
+        return lambda func: func
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -45,7 +84,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="JARVIS Core - German Conversation AI", 
     version="2.0.0",
-    description="JARVIS Core Service with German language conversation capabilities"
+    description="JARVIS Core Service with German language conversation capabilities",
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration for frontend
@@ -60,6 +100,7 @@ app.add_middleware(
 # Data models
 class ConversationRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None
     language: Optional[str] = "auto"
     voice_enabled: Optional[bool] = True
 
@@ -84,80 +125,296 @@ class IdeaResponse(BaseModel):
     message: str
     generated_content: Optional[Dict] = None
 
-# In-memory storage for conversations
-conversations: Dict[str, List[Dict]] = {}
-connected_clients: List[WebSocket] = []
+# Conversation history lives in Redis when REDIS_URL is set so every uvicorn
+# worker sees the same sessions; otherwise it falls back to this process
+CONVERSATION_TTL_SECONDS = int(os.getenv('CONVERSATION_TTL_SECONDS', '3600'))
+BROADCAST_CHANNEL = "jarvis:broadcast"
+# Published by /debug/cache/clear so every worker drops its in-process caches
+CACHE_CLEAR_CHANNEL = "jarvis:cache-clear"
+CACHE_CLEAR_CHANNEL_BYTES = CACHE_CLEAR_CHANNEL.encode()
+# Backoff bounds in seconds for resubscribing after the pub/sub connection drops
+BROADCAST_RECONNECT_MIN = 0.5
+BROADCAST_RECONNECT_MAX = 30.0
+redis_client = None
+
+# Strong references to fire-and-forget startup tasks so they aren't collected
+background_tasks: Set[asyncio.Task] = set()
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# In-memory storage for conversations, bounded and expired after an hour idle
+conversations: TTLCache = TTLCache(
+    maxsize=int(os.getenv('CONVERSATION_CACHE_SIZE', '10000')),
+    ttl=CONVERSATION_TTL_SECONDS
+)
+
+async def append_conversation(session_id: str, entry: Dict):
+    """Append a turn to a session's history and refresh its TTL"""
+    if redis_client:
+        key = f"jarvis:conversation:{session_id}"
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.rpush(key, orjson.dumps(entry))
+                pipe.expire(key, CONVERSATION_TTL_SECONDS)
+                await pipe.execute()
+            return
+        except RedisError as e:
+            # The reply is already computed; keep the turn locally rather than fail the request
+            logger.error(f"Failed to store conversation in Redis, keeping it in this worker: {e}")
+    # Re-assigning refreshes the session's TTL
+    history = conversations.get(session_id, [])
+    history.append(entry)
+    conversations[session_id] = history
+
+async def get_conversation_history(session_id: str) -> Optional[List[Dict]]:
+    """Return a session's history, or None if it is unknown or expired"""
+    if redis_client:
+        try:
+            entries = await redis_client.lrange(f"jarvis:conversation:{session_id}", 0, -1)
+            if entries:
+                return [orjson.loads(entry) for entry in entries]
+        except RedisError as e:
+            logger.error(f"Failed to read conversation from Redis: {e}")
+    # Turns stored locally while Redis was unavailable
+    return conversations.get(session_id)
+# WebSocket frames are encoded once per message and sent as the same bytes to every client
+frame_encoder = msgspec.json.Encoder()
+# Clients connecting with ?format=msgpack get the same frames as MessagePack
+msgpack_encoder = msgspec.msgpack.Encoder()
+
+# Outbound frames buffered per client before the oldest are dropped
+CLIENT_QUEUE_SIZE = int(os.getenv('WS_CLIENT_QUEUE_SIZE', '64'))
+# Most queued messages coalesced into one {"batch": [...]} frame
+FRAME_BATCH_SIZE = 32
+
+class ClientConn:
+    """A WebSocket client with a bounded outbound queue drained by its own sender task
+    
+    Broadcasters never wait on the network, so a slow client only delays itself
+    and its memory use is capped at CLIENT_QUEUE_SIZE frames.
+    """
+    
+    def __init__(self, websocket: WebSocket, msgpack: bool = False, maxsize: int = CLIENT_QUEUE_SIZE):
+        self.websocket = websocket
+        self.msgpack = msgpack
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.drops = 0
+        self.task = asyncio.create_task(self._sender())
+    
+    def send(self, payload: bytes):
+        """Queue a frame without waiting; a full queue drops its oldest frame"""
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.drops += 1
+            self.queue.get_nowait()
+            self.queue.put_nowait(payload)
+    
+    def pack_batch(self, frames: List[bytes]) -> bytes:
+        """Join already-encoded messages into one {"batch": [...]} frame without re-encoding"""
+        if self.msgpack:
+            count = len(frames)
+            header = bytes([0x90 | count]) if count < 16 else b"\xdc" + struct.pack(">H", count)
+            return b"\x81\xa5batch" + header + b"".join(frames)
+        return b'{"batch":[' + b",".join(frames) + b"]}"
+    
+    async def _sender(self):
+        try:
+            while True:
+                payload = await self.queue.get()
+                # Whatever piled up while the last send was in flight goes out as one frame
+                if not self.queue.empty():
+                    frames = [payload]
+                    while not self.queue.empty() and len(frames) < FRAME_BATCH_SIZE:
+                        frames.append(self.queue.get_nowait())
+                    payload = self.pack_batch(frames)
+                await self.websocket.send_bytes(payload)
+        except (WebSocketDisconnect, RuntimeError):
+            # Client went away; the endpoint notices the finished task and cleans up
+            pass
+        except Exception as e:
+            # Any other send failure also ends this client, but is logged rather than left unretrieved
+            logger.error(f"WebSocket sender failed: {e}")
+    
+    def close(self):
+        self.task.cancel()
+        if self.drops:
+            logger.warning(f"Dropped {self.drops} frames for a slow WebSocket client")
+
+connected_clients: Set[ClientConn] = set()
+# Guards structural changes; broadcasts iterate over a snapshot instead
+clients_lock = asyncio.Lock()
+
+async def broadcast(message: Dict):
+    """Send a message to all connected WebSocket clients, on every worker"""
+    payload = frame_encoder.encode(message)
+    if redis_client:
+        try:
+            # Every worker, including this one, relays it via relay_broadcasts()
+            await redis_client.publish(BROADCAST_CHANNEL, payload)
+            return
+        except RedisError as e:
+            logger.error(f"Failed to publish broadcast to Redis, sending to this worker's clients only: {e}")
+    send_to_clients(payload)
+
+async def relay_broadcasts():
+    """Forward messages published by any worker to this worker's clients, and apply cache clears
+    
+    Resubscribes with exponential backoff if the pub/sub connection drops, so
+    this worker's clients don't silently stop receiving broadcasts.
+    """
+    delay = BROADCAST_RECONNECT_MIN
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(BROADCAST_CHANNEL, CACHE_CLEAR_CHANNEL)
+            delay = BROADCAST_RECONNECT_MIN
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                if message["channel"] == CACHE_CLEAR_CHANNEL_BYTES:
+                    clear_local_caches()
+                else:
+                    send_to_clients(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast relay lost its Redis subscription, retrying in {delay:.1f}s: {e}")
+        finally:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, BROADCAST_RECONNECT_MAX)
+
+def clear_local_caches():
+    """Drop this worker's memoized language detections, Azure AI configuration check and capabilities body"""
+    _detect_cached.cache_clear()
+    validate_azure_ai_config.cache_clear()
+    capabilities_response.cache_clear()
+
+def send_to_clients(payload: bytes):
+    """Queue a pre-encoded JSON frame for each of this worker's WebSocket clients"""
+    packed = None
+    for client in tuple(connected_clients):
+        if client.msgpack:
+            # Transcoded at most once per broadcast, and only if a msgpack client is connected
+            if packed is None:
+                packed = msgpack_encoder.encode(msgspec.json.decode(payload))
+            client.send(packed)
+        else:
+            client.send(payload)
+
+# Column order shared by single and bulk idea inserts
+IDEA_INSERT_COLUMNS = (
+    "original_prompt", "submitted_by", "generated_title",
+    "description_bullet_1", "description_bullet_2", "description_bullet_3",
+    "detailed_concept", "optimized_claude_prompt", "category",
+    "complexity", "tags", "requirements_notes", "azure_processing_status"
+)
+
+def idea_record(idea_data: Dict) -> Tuple:
+    """Values for one idea in IDEA_INSERT_COLUMNS order"""
+    return (
+        idea_data['original_prompt'],
+        idea_data.get('submitted_by'),
+        idea_data.get('generated_title'),
+        *(list(idea_data.get('bullet_points') or []) + [None, None, None])[:3],
+        idea_data.get('detailed_concept'),
+        idea_data.get('optimized_prompt'),
+        idea_data.get('category'),
+        idea_data.get('complexity'),
+        idea_data.get('tags', []),
+        idea_data.get('requirements_notes'),
+        idea_data.get('azure_processing_status', 'completed')
+    )
+
+# Write-path statements; kept as constants so each pooled connection parses and
+# plans them once and then reuses its cached prepared statement
+INSERT_IDEA_SQL = (
+    f"INSERT INTO ideas ({', '.join(IDEA_INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join(f'${i}' for i in range(1, len(IDEA_INSERT_COLUMNS) + 1))}) "
+    "RETURNING id"
+)
+
+UPDATE_IDEA_FULL_SQL = """
+    UPDATE ideas SET 
+        status = $2,
+        generated_title = $3,
+        description_bullet_1 = $4,
+        description_bullet_2 = $5,
+        description_bullet_3 = $6,
+        detailed_concept = $7,
+        optimized_claude_prompt = $8,
+        category = $9,
+        complexity = $10,
+        tags = $11,
+        requirements_notes = $12,
+        azure_processing_status = $13,
+        processed_date = CURRENT_TIMESTAMP,
+        last_updated = CURRENT_TIMESTAMP
+    WHERE id = $1
+"""
+
+UPDATE_IDEA_STATUS_SQL = "UPDATE ideas SET status = $2, last_updated = CURRENT_TIMESTAMP WHERE id = $1"
+
+# Most ideas accepted by one /ideas/bulk request, so a single COPY stays bounded
+MAX_BULK_IDEAS = int(os.getenv('MAX_BULK_IDEAS', '1000'))
 
 # Database connection
 class DatabaseManager:
     def __init__(self):
         self.org_db_url = os.getenv('POSTGRES_ORG_URL')
-        
-    async def get_org_connection(self):
-        """Get connection to organization database"""
+        self.pool: Optional["asyncpg.Pool"] = None
+    
+    async def init_pool(self):
+        """Open the process-wide connection pool to the organization database"""
         if not self.org_db_url:
+            return
+        self.pool = await asyncpg.create_pool(
+            self.org_db_url,
+            min_size=int(os.getenv('POSTGRES_POOL_MIN_SIZE', '10')),
+            max_size=int(os.getenv('POSTGRES_POOL_MAX_SIZE', '50')),
+            command_timeout=60,
+            max_inactive_connection_lifetime=300,
+            statement_cache_size=1024,
+            max_cached_statement_lifetime=0
+        )
+    
+    async def close_pool(self):
+        if self.pool:
+            await self.pool.close()
+    
+    def acquire(self):
+        """Borrow a pooled connection to the organization database"""
+        if not self.pool:
             raise HTTPException(status_code=500, detail="Database connection not configured")
-        return await asyncpg.connect(self.org_db_url)
+        return self.pool.acquire()
     
     async def insert_idea(self, idea_data: Dict) -> int:
         """Insert new idea into database"""
-        conn = await self.get_org_connection()
-        try:
-            query = """
-                INSERT INTO ideas (
-                    original_prompt, submitted_by, generated_title,
-                    description_bullet_1, description_bullet_2, description_bullet_3,
-                    detailed_concept, optimized_claude_prompt, category,
-                    complexity, tags, requirements_notes, azure_processing_status
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-                RETURNING id
-            """
-            
-            result = await conn.fetchval(
-                query,
-                idea_data['original_prompt'],
-                idea_data.get('submitted_by'),
-                idea_data.get('generated_title'),
-                idea_data.get('bullet_points', [None, None, None])[0],
-                idea_data.get('bullet_points', [None, None, None])[1],
-                idea_data.get('bullet_points', [None, None, None])[2],
-                idea_data.get('detailed_concept'),
-                idea_data.get('optimized_prompt'),
-                idea_data.get('category'),
-                idea_data.get('complexity'),
-                idea_data.get('tags', []),
-                idea_data.get('requirements_notes'),
-                idea_data.get('azure_processing_status', 'completed')
-            )
+        async with self.acquire() as conn:
+            result = await conn.fetchval(INSERT_IDEA_SQL, *idea_record(idea_data))
             return result
-        finally:
-            await conn.close()
+    
+    async def bulk_insert_ideas(self, items: List[Dict]) -> int:
+        """Insert many ideas in one COPY round trip; returns the number of rows written"""
+        records = [idea_record(item) for item in items]
+        async with self.acquire() as conn:
+            await conn.copy_records_to_table("ideas", records=records, columns=IDEA_INSERT_COLUMNS)
+        return len(records)
     
     async def update_idea_status(self, idea_id: int, status: str, processing_data: Optional[Dict] = None):
         """Update idea processing status"""
-        conn = await self.get_org_connection()
-        try:
+        async with self.acquire() as conn:
             if processing_data:
-                query = """
-                    UPDATE ideas SET 
-                        status = $2,
-                        generated_title = $3,
-                        description_bullet_1 = $4,
-                        description_bullet_2 = $5,
-                        description_bullet_3 = $6,
-                        detailed_concept = $7,
-                        optimized_claude_prompt = $8,
-                        category = $9,
-                        complexity = $10,
-                        tags = $11,
-                        requirements_notes = $12,
-                        azure_processing_status = $13,
-                        processed_date = CURRENT_TIMESTAMP,
-                        last_updated = CURRENT_TIMESTAMP
-                    WHERE id = $1
-                """
                 await conn.execute(
-                    query, idea_id, status,
+                    UPDATE_IDEA_FULL_SQL, idea_id, status,
                     processing_data.get('title'),
                     processing_data.get('bullet_points', [None, None, None])[0],
                     processing_data.get('bullet_points', [None, None, None])[1],
@@ -171,15 +428,11 @@ class DatabaseManager:
                     'completed'
                 )
             else:
-                query = "UPDATE ideas SET status = $2, last_updated = CURRENT_TIMESTAMP WHERE id = $1"
-                await conn.execute(query, idea_id, status)
-        finally:
-            await conn.close()
+                await conn.execute(UPDATE_IDEA_STATUS_SQL, idea_id, status)
 
     async def get_ideas(self, limit: int = 50, status_filter: Optional[str] = None) -> List[Dict]:
         """Retrieve ideas from database"""
-        conn = await self.get_org_connection()
-        try:
+        async with self.acquire() as conn:
             if status_filter:
                 query = """
                     SELECT * FROM ideas 
@@ -197,8 +450,52 @@ class DatabaseManager:
                 rows = await conn.fetch(query, limit)
             
             return [dict(row) for row in rows]
-        finally:
-            await conn.close()
+    
+    async def get_idea_by_id(self, idea_id: int) -> Optional[Dict]:
+        """Retrieve a single idea by primary key"""
+        async with self.acquire() as conn:
+            row = await conn.fetchrow("SELECT * FROM ideas WHERE id = $1", idea_id)
+            return dict(row) if row else None
+
+    async def get_stats(self) -> Dict:
+        """Aggregate idea statistics in PostgreSQL"""
+        async with self.acquire() as conn:
+            summary = await conn.fetchrow("""
+                SELECT
+                    COUNT(*) AS total_ideas,
+                    COALESCE(ROUND(AVG(COALESCE(complexity, 3)), 2), 0) AS average_complexity,
+                    COUNT(*) FILTER (WHERE submission_date >= CURRENT_DATE) AS recent_submissions
+                FROM ideas
+            """)
+            groups = await conn.fetch("""
+                SELECT status, category, complexity, COUNT(*) AS count
+                FROM (
+                    SELECT
+                        COALESCE(status, 'unknown') AS status,
+                        COALESCE(category, 'uncategorized') AS category,
+                        COALESCE(complexity, 3) AS complexity
+                    FROM ideas
+                ) AS normalized
+                GROUP BY GROUPING SETS ((status), (category), (complexity))
+            """)
+        
+        stats = {
+            "total_ideas": summary['total_ideas'],
+            "by_status": {},
+            "by_category": {},
+            "by_complexity": {},
+            "average_complexity": float(summary['average_complexity']),
+            "recent_submissions": summary['recent_submissions']
+        }
+        # Each row belongs to exactly one grouping set; the other columns are NULL
+        for row in groups:
+            if row['status'] is not None:
+                stats["by_status"][row['status']] = row['count']
+            elif row['category'] is not None:
+                stats["by_category"][row['category']] = row['count']
+            else:
+                stats["by_complexity"][str(row['complexity'])] = row['count']
+        return stats
 
 db_manager = DatabaseManager()
 
@@ -226,107 +523,441 @@ JARVIS_RESPONSES_DE = {
     ]
 }
 
+# Trigger keywords per intent for process_german_text
+INTENT_KEYWORDS = {
+    "greeting": ("hallo", "hi", "guten tag", "servus"),
+    "goodbye": ("tschüss", "auf wiedersehen", "bis bald"),
+    "help": ("hilfe", "help", "was kannst du"),
+    "wellbeing": ("wie geht es dir", "wie geht's"),
+    "time": ("wie spät", "uhrzeit"),
+    "date": ("datum", "welcher tag"),
+}
+
+# All intents compiled into one alternation so a message is scanned once;
+# the named group that matched is the intent
+INTENT_RE = re.compile(
+    r"\b(?:" + "|".join(
+        f"(?P<{intent}>" + "|".join(re.escape(k).replace(r"\ ", r"\s+") for k in keywords) + ")"
+        for intent, keywords in INTENT_KEYWORDS.items()
+    ) + r")\b",
+    re.IGNORECASE
+)
+
+class PiperSynth:
+    """Text-to-speech via the piper CLI, synthesized straight into memory"""
+    
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.binary = shutil.which("piper")
+        self.sample_rate = self._load_sample_rate()
+    
+    def _load_sample_rate(self) -> int:
+        """Read the output sample rate from the voice's .onnx.json config"""
+        try:
+            with open(f"{self.model_path}.json", encoding="utf-8") as f:
+                return json.load(f)["audio"]["sample_rate"]
+        except Exception:
+            return 22050
+    
+    @property
+    def available(self) -> bool:
+        return self.binary is not None and os.path.exists(self.model_path)
+    
+    def stream_header(self) -> bytes:
+        """WAV header for 16-bit mono PCM of unknown length
+        
+        The RIFF and data sizes are set to 0xFFFFFFFF, which players treat as
+        "read until end of stream".
+        """
+        byte_rate = self.sample_rate * 2
+        return (
+            b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, self.sample_rate, byte_rate, 2, 16)
+            + b"data" + struct.pack("<I", 0xFFFFFFFF)
+        )
+    
+    async def stream(self, text: str, chunk_size: int = 4096) -> AsyncIterator[bytes]:
+        """Synthesize text and yield raw 16-bit mono PCM chunks as piper produces them"""
+        # Each call runs its own piper process, so concurrent requests don't wait on each other
+        proc = await asyncio.create_subprocess_exec(
+            self.binary, "--model", self.model_path, "--output_raw",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        # Drained alongside stdout so piper can't block on a full stderr pipe while we wait for audio
+        stderr_task = asyncio.create_task(proc.stderr.read())
+        try:
+            proc.stdin.write(text.encode("utf-8"))
+            await proc.stdin.drain()
+            proc.stdin.close()
+            
+            while chunk := await proc.stdout.read(chunk_size):
+                yield chunk
+            
+            stderr = await stderr_task
+            if await proc.wait() != 0:
+                raise RuntimeError(f"piper exited with {proc.returncode}: {stderr.decode(errors='replace')}")
+        finally:
+            # Client went away mid-stream; don't leave piper running
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            stderr_task.cancel()
+    
+    async def synthesize(self, text: str) -> bytes:
+        """Synthesize text and return a complete WAV file as bytes"""
+        pcm = b"".join([chunk async for chunk in self.stream(text)])
+        return self.to_wav(pcm)
+    
+    def to_wav(self, pcm: bytes) -> bytes:
+        """Wrap piper's 16-bit mono PCM in a WAV container"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+# Messages opening with a common German word skip the language model
+_FAST_DE = re.compile(
+    r"^\s*(?:hallo|ja|nein|danke|bitte|tschüss|guten\s+(?:tag|morgen|abend)|servus|wie\s+geht)\b",
+    re.IGNORECASE
+)
+
+# Input sample rate of the Whisper models
+WHISPER_SAMPLE_RATE = 16000
+
+# Whisper model replicas, each able to run one transcription at a time
+STT_CONCURRENCY = int(os.getenv('JARVIS_STT_CONCURRENCY', '2'))
+# Requests beyond STT_CONCURRENCY wait here instead of occupying pool threads
+stt_semaphore = asyncio.Semaphore(STT_CONCURRENCY)
+# CPU threads per replica; by default the container's CPU budget is split across every
+# uvicorn worker's replicas, using the same limits main.py sizes the workers from
+STT_THREADS = int(os.getenv('JARVIS_STT_THREADS', str(max(
+    1, int(available_cpus() // (worker_count() * STT_CONCURRENCY))
+))))
+
+@functools.lru_cache(maxsize=4096)
+def _detect_cached(text: str) -> str:
+    """Language of a truncated message; short repeated phrases skip the model"""
+    try:
+        result = german_engine.language_detector(text, low_memory=True)
+        return result["lang"] or "de"
+    except Exception:
+        return "de"  # Default to German
+
 class GermanConversationEngine:
     def __init__(self):
-        self.recognizer = None
+        self.whisper = None
+        self.language_detector = None
+        self.streaming_model = None
+        # Synthesized audio keyed by tts_etag; responses repeat a lot, so workers share one cache
+        self.tts_cache = self.create_tts_cache()
         self.tts_engine = None
         self.initialize_engines()
     
     def initialize_engines(self):
         """Initialize speech recognition and TTS engines"""
         try:
-            self.recognizer = sr.Recognizer()
-            self.tts_engine = pyttsx3.init()
+            from faster_whisper import WhisperModel
             
-            # Configure German TTS
-            voices = self.tts_engine.getProperty('voices')
-            for voice in voices:
-                if 'german' in voice.name.lower() or 'deutsch' in voice.name.lower():
-                    self.tts_engine.setProperty('voice', voice.id)
-                    break
+            # Loaded once; INT8 keeps CPU transcription in the interactive range at a
+            # slightly higher word error rate than float32
+            self.whisper = WhisperModel(
+                os.getenv('WHISPER_MODEL', 'small'),
+                device="cpu",
+                compute_type=os.getenv('JARVIS_STT_QUANT', 'int8'),
+                num_workers=STT_CONCURRENCY,
+                cpu_threads=STT_THREADS
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize speech recognition: {e}")
+        
+        try:
+            from fast_langdetect import detect
             
-            self.tts_engine.setProperty('rate', 150)  # Speaking rate
-            self.tts_engine.setProperty('volume', 0.8)  # Volume level
+            # fastText language ID with the bundled compact model
+            self.language_detector = detect
+        except Exception as e:
+            logger.error(f"Failed to initialize language detection: {e}")
+        
+        try:
+            import vosk
             
+            # Vosk gives partial results while audio is still arriving
+            vosk.SetLogLevel(-1)
+            self.streaming_model = vosk.Model(os.getenv('VOSK_MODEL', '/app/models/vosk-model-small-de-0.15'))
         except Exception as e:
-            logger.error(f"Failed to initialize speech engines: {e}")
+            logger.error(f"Failed to initialize streaming speech recognition: {e}")
+        
+        # German TTS voice
+        synth = PiperSynth(os.getenv('PIPER_MODEL', '/app/models/de_DE-thorsten-medium.onnx'))
+        if synth.available:
+            self.tts_engine = synth
+        else:
+            logger.error(f"Piper TTS not available (model: {synth.model_path})")
+    
+    def create_tts_cache(self):
+        """Disk-backed cache shared across workers, or a per-process LRU without diskcache"""
+        if Cache is not None:
+            try:
+                return Cache(
+                    os.getenv('TTS_CACHE_DIR', '/app/data/tts-cache'),
+                    size_limit=int(os.getenv('TTS_CACHE_SIZE_LIMIT', str(1 << 30)))
+                )
+            except Exception as e:
+                logger.error(f"Failed to open shared TTS cache, using per-process cache: {e}")
+        return LRUCache(maxsize=int(os.getenv('TTS_CACHE_SIZE', '512')))
+    
+    async def get_cached_audio(self, key: str) -> Optional[bytes]:
+        """Look up synthesized audio; diskcache reads SQLite and files, so it runs in a thread"""
+        if isinstance(self.tts_cache, LRUCache):
+            return self.tts_cache.get(key)
+        return await asyncio.to_thread(self.tts_cache.get, key)
+    
+    async def store_cached_audio(self, key: str, audio_data: bytes):
+        """Store synthesized audio without blocking the event loop on disk writes"""
+        if isinstance(self.tts_cache, LRUCache):
+            self.tts_cache[key] = audio_data
+        else:
+            await asyncio.to_thread(self.tts_cache.set, key, audio_data)
     
     def detect_language(self, text: str) -> str:
         """Detect the language of input text"""
-        try:
-            lang = detect(text)
-            return lang
-        except:
-            return "de"  # Default to German
+        # Too short to classify reliably, or obviously German
+        if len(text) < 20 or _FAST_DE.match(text):
+            return "de"
+        # The first 80 characters are enough to tell German from English
+        return _detect_cached(text[:80].replace("\n", " "))
     
     def process_german_text(self, text: str) -> str:
         """Process German text and generate appropriate response"""
-        text_lower = text.lower()
+        match = INTENT_RE.search(text)
+        intent = match.lastgroup if match else "unknown"
         
         # Simple keyword-based responses
-        if any(word in text_lower for word in ["hallo", "hi", "guten tag", "servus"]):
-            return JARVIS_RESPONSES_DE["greeting"][0]
-        elif any(word in text_lower for word in ["tschüss", "auf wiedersehen", "bis bald"]):
-            return JARVIS_RESPONSES_DE["goodbye"][0]
-        elif any(word in text_lower for word in ["hilfe", "help", "was kannst du"]):
-            return JARVIS_RESPONSES_DE["help"][0]
-        elif "wie geht es dir" in text_lower or "wie geht's" in text_lower:
+        if intent == "wellbeing":
             return "Mir geht es gut, danke! Ich bin bereit, Ihnen zu helfen."
-        elif "wie spät" in text_lower or "uhrzeit" in text_lower:
+        elif intent == "time":
             now = datetime.now()
             return f"Es ist jetzt {now.strftime('%H:%M Uhr')}."
-        elif "datum" in text_lower or "welcher tag" in text_lower:
+        elif intent == "date":
             now = datetime.now()
             return f"Heute ist der {now.strftime('%d.%m.%Y')}."
         else:
-            return JARVIS_RESPONSES_DE["unknown"][0]
+            return JARVIS_RESPONSES_DE[intent][0]
+    
+    def load_audio(self, audio_data: bytes):
+        """Decode to the 16 kHz mono float32 array Whisper expects
+        
+        Formats libsndfile can't read (e.g. WebM/Opus from MediaRecorder) are
+        passed through as a file object for faster-whisper to decode itself.
+        """
+        try:
+            samples, sample_rate = sf.read(io.BytesIO(audio_data), dtype="float32")
+        except Exception:
+            return io.BytesIO(audio_data)
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            divisor = math.gcd(WHISPER_SAMPLE_RATE, sample_rate)
+            samples = resample_poly(samples, WHISPER_SAMPLE_RATE // divisor, sample_rate // divisor)
+        return samples.astype(np.float32, copy=False)
     
-    def text_to_speech(self, text: str) -> bytes:
+    def recognize_speech(self, audio_data: bytes) -> Tuple[str, str]:
+        """Transcribe audio with the local Whisper model (blocking)"""
+        # Whisper detects the language in the same pass, so no de/en retry is needed
+        segments, info = self.whisper.transcribe(
+            self.load_audio(audio_data), language=None, beam_size=1, vad_filter=True
+        )
+        text = "".join(segment.text for segment in segments).strip()
+        if not text:
+            raise ValueError("Could not understand audio")
+        return text, info.language
+    
+    def tts_etag(self, text: str, voice: str = "default", language: str = "de") -> str:
+        """Stable ETag for the audio a given TTS request produces"""
+        model = self.tts_engine.model_path if self.tts_engine else ""
+        key = f"{model}|{voice}|{language}|{text}".encode("utf-8")
+        return hashlib.blake2b(key, digest_size=16).hexdigest()
+    
+    async def text_to_speech(self, text: str, voice: str = "default", language: str = "de") -> bytes:
         """Convert German text to speech"""
         try:
             if not self.tts_engine:
                 raise Exception("TTS engine not initialized")
             
-            # Save to temporary file
-            audio_buffer = io.BytesIO()
-            self.tts_engine.save_to_file(text, 'temp_speech.wav')
-            self.tts_engine.runAndWait()
-            
-            # Read the file and return bytes
-            with open('temp_speech.wav', 'rb') as f:
-                audio_data = f.read()
-            
+            key = self.tts_etag(text, voice, language)
+            audio_data = await self.get_cached_audio(key)
+            if audio_data is None:
+                audio_data = await self.tts_engine.synthesize(text)
+                await self.store_cached_audio(key, audio_data)
             return audio_data
             
         except Exception as e:
             logger.error(f"TTS conversion failed: {e}")
             return b""
+    
+    async def stream_speech(self, text: str, voice: str = "default", language: str = "de") -> AsyncIterator[bytes]:
+        """Yield a WAV stream as it is synthesized, caching the complete file afterwards"""
+        key = self.tts_etag(text, voice, language)
+        pcm = []
+        yield self.tts_engine.stream_header()
+        try:
+            async for chunk in self.tts_engine.stream(text):
+                pcm.append(chunk)
+                yield chunk
+        except Exception as e:
+            # Headers are already sent, so the client sees a truncated stream
+            logger.error(f"TTS streaming failed: {e}")
+            return
+        await self.store_cached_audio(key, self.tts_engine.to_wav(b"".join(pcm)))
 
 # Initialize German conversation engine
 german_engine = GermanConversationEngine()
 
+@app.on_event("startup")
+async def configure_thread_pool():
+    """Size the default executor used by asyncio.to_thread for blocking speech work"""
+    max_workers = int(os.getenv('JARVIS_THREAD_POOL_SIZE', '64'))
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
+
+@app.on_event("startup")
+async def connect_redis():
+    """Share conversations and broadcasts across workers through Redis"""
+    global redis_client
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return
+    try:
+        client = aioredis.from_url(redis_url, password=os.getenv('REDIS_PASSWORD'))
+        await client.ping()
+        redis_client = client
+        run_in_background(relay_broadcasts())
+    except Exception as e:
+        logger.error(f"Failed to connect to Redis, using per-process state: {e}")
+
+@app.on_event("shutdown")
+async def close_redis():
+    if redis_client:
+        await redis_client.close()
+
+@app.on_event("startup")
+async def open_database_pool():
+    try:
+        await db_manager.init_pool()
+    except Exception as e:
+        logger.error(f"Failed to create database pool: {e}")
+
+@app.on_event("shutdown")
+async def close_database_pool():
+    await db_manager.close_pool()
+
+@app.on_event("shutdown")
+async def close_azure_ai_session():
+    await close_azure_session()
+
+@app.on_event("startup")
+async def warm_spectrum_kernel():
+    """Trigger the Numba compile in the background so the first request doesn't pay for it"""
+    if np is None:
+        return
+    run_in_background(asyncio.to_thread(
+        bin_spectrum, np.zeros(2), np.zeros(2, dtype=np.int64), np.empty(1)
+    ))
+
+# Held by the worker that warms the TTS cache; expires so a crashed warm-up is retried later
+TTS_WARMUP_LOCK = "jarvis:tts-warmup"
+TTS_WARMUP_LOCK_TTL = 600
+
+async def claim_tts_warmup() -> bool:
+    """Atomically claim the warm-up so only one worker synthesizes the canned responses"""
+    if not isinstance(german_engine.tts_cache, LRUCache):
+        # diskcache add() only writes if the key is absent, across processes
+        return await asyncio.to_thread(
+            german_engine.tts_cache.add, TTS_WARMUP_LOCK, os.getpid(), expire=TTS_WARMUP_LOCK_TTL
+        )
+    if redis_client:
+        # Caches aren't shared here, but one warm-up keeps N piper processes from competing at boot
+        try:
+            return bool(await redis_client.set(TTS_WARMUP_LOCK, os.getpid(), nx=True, ex=TTS_WARMUP_LOCK_TTL))
+        except RedisError as e:
+            logger.error(f"Failed to claim TTS warm-up lock: {e}")
+            return False
+    # Per-process cache without Redis: each worker can only warm its own
+    return True
+
+@app.on_event("startup")
+async def warm_tts_cache():
+    """Pre-synthesize the canned German responses in the background, in one worker only"""
+    async def warm():
+        if not await claim_tts_warmup():
+            return
+        for responses in JARVIS_RESPONSES_DE.values():
+            for text in responses:
+                # Already-cached texts are served from the cache without running piper
+                await german_engine.text_to_speech(text)
+    
+    if german_engine.tts_engine:
+        run_in_background(warm())
+
+# Static payloads are serialized once at import and served as raw bytes
+ROOT_RESPONSE = orjson.dumps({
+    "message": "JARVIS Core Service mit deutscher Konversation", 
+    "status": "running",
+    "features": [
+        "German conversation",
+        "Speech recognition", 
+        "Text-to-speech",
+        "Audio spectrum analysis"
+    ]
+})
+HEALTH_RESPONSE = orjson.dumps({"status": "healthy", "language_support": ["de", "en"]})
+
 @app.get("/")
 async def root():
-    return {
-        "message": "JARVIS Core Service mit deutscher Konversation", 
-        "status": "running",
-        "features": [
-            "German conversation",
-            "Speech recognition", 
-            "Text-to-speech",
-            "Audio spectrum analysis"
-        ]
-    }
+    return Response(content=ROOT_RESPONSE, media_type="application/json")
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "language_support": ["de", "en"]}
+    return Response(content=HEALTH_RESPONSE, media_type="application/json")
+
+# Unauthenticated debug routes are only registered when explicitly enabled
+DEBUG_ENDPOINTS = os.getenv('JARVIS_DEBUG_ENDPOINTS', '').lower() in ('1', 'true', 'yes')
+
+async def debug_cache():
+    """Cache statistics for tuning cache sizes"""
+    return {
+        "language_detection": _detect_cached.cache_info()._asdict(),
+        "tts_entries": await asyncio.to_thread(len, german_engine.tts_cache)
+    }
+
+async def clear_debug_caches():
+    """Drop memoized language detections and the Azure AI configuration check on every worker
+    
+    Workers are reached through Redis; without REDIS_URL only the worker that
+    handles the request is cleared.
+    """
+    if redis_client:
+        # Every worker, including this one, clears its caches via relay_broadcasts()
+        await redis_client.publish(CACHE_CLEAR_CHANNEL, b"clear")
+    else:
+        clear_local_caches()
+    return {"cleared": ["language_detection", "azure_ai_config", "capabilities"]}
+
+if DEBUG_ENDPOINTS:
+    app.add_api_route("/debug/cache", debug_cache, methods=["GET"])
+    app.add_api_route("/debug/cache/clear", clear_debug_caches, methods=["POST"])
 
 @app.post("/conversation")
 async def process_conversation(request: ConversationRequest):
     """Process conversation in German or English"""
     try:
-        session_id = str(uuid.uuid4())
+        # Time-ordered ids, only minted for new sessions
+        session_id = request.session_id or str(uuid7())
+        timestamp = datetime.now().isoformat()
         
         # Detect language if auto-detection is enabled
         if request.language == "auto":
@@ -342,11 +973,8 @@ async def process_conversation(request: ConversationRequest):
             response_text = f"I understand. You said: {request.message}"
         
         # Store conversation
-        if session_id not in conversations:
-            conversations[session_id] = []
-        
-        conversations[session_id].append({
-            "timestamp": datetime.now().isoformat(),
+        await append_conversation(session_id, {
+            "timestamp": timestamp,
             "user_message": request.message,
             "jarvis_response": response_text,
             "language": detected_lang
@@ -359,14 +987,10 @@ async def process_conversation(request: ConversationRequest):
             "user_message": request.message,
             "jarvis_response": response_text,
             "language": detected_lang,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp
         }
         
-        for client in connected_clients[:]:
-            try:
-                await client.send_text(json.dumps(message_data))
-            except:
-                connected_clients.remove(client)
+        await broadcast(message_data)
         
         return {
             "session_id": session_id,
@@ -383,26 +1007,18 @@ async def process_conversation(request: ConversationRequest):
 async def speech_to_text(audio: UploadFile = File(...)):
     """Convert speech to text (German/English)"""
     try:
-        if not german_engine.recognizer:
+        if not german_engine.whisper:
             raise HTTPException(status_code=503, detail="Speech recognition not available")
         
         # Read audio file
         audio_data = await audio.read()
         
-        # Process with speech recognition
-        with sr.AudioFile(io.BytesIO(audio_data)) as source:
-            audio = german_engine.recognizer.record(source)
-            
-            # Try German first, then English
-            try:
-                text = german_engine.recognizer.recognize_google(audio, language="de-DE")
-                language = "de"
-            except:
-                try:
-                    text = german_engine.recognizer.recognize_google(audio, language="en-US")
-                    language = "en"
-                except:
-                    raise HTTPException(status_code=400, detail="Could not understand audio")
+        # Whisper inference runs in a worker thread, off the event loop
+        try:
+            async with stt_semaphore:
+                text, language = await asyncio.to_thread(german_engine.recognize_speech, audio_data)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Could not understand audio")
         
         return {
             "text": text,
@@ -410,25 +1026,37 @@ async def speech_to_text(audio: UploadFile = File(...)):
             "confidence": 0.8  # Mock confidence score
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Speech recognition failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/text-to-speech")
-async def text_to_speech(request: TTSRequest):
+async def text_to_speech(request: TTSRequest, if_none_match: Optional[str] = Header(None)):
     """Convert German text to speech"""
     try:
-        audio_data = german_engine.text_to_speech(request.text)
+        etag = f'"{german_engine.tts_etag(request.text, request.voice, request.language)}"'
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
         
-        if not audio_data:
-            raise HTTPException(status_code=500, detail="TTS conversion failed")
+        if not german_engine.tts_engine:
+            raise HTTPException(status_code=503, detail="Text-to-speech not available")
         
+        headers = {"Content-Disposition": "attachment; filename=speech.wav", "ETag": etag}
+        audio_data = await german_engine.get_cached_audio(etag.strip('"'))
+        if audio_data is not None:
+            return Response(audio_data, media_type="audio/wav", headers=headers)
+        
+        # Send the header and PCM as piper produces it instead of waiting for the whole utterance
         return StreamingResponse(
-            io.BytesIO(audio_data),
+            german_engine.stream_speech(request.text, request.voice, request.language),
             media_type="audio/wav",
-            headers={"Content-Disposition": "attachment; filename=speech.wav"}
+            headers=headers
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"TTS failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -436,32 +1064,128 @@ async def text_to_speech(request: TTSRequest):
 @app.get("/conversations/{session_id}")
 async def get_conversation(session_id: str):
     """Get conversation history"""
-    if session_id in conversations:
-        return {"session_id": session_id, "messages": conversations[session_id]}
+    messages = await get_conversation_history(session_id)
+    if messages is not None:
+        return {"session_id": session_id, "messages": messages}
     else:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
 @app.websocket("/ws/conversation")
 async def websocket_conversation(websocket: WebSocket):
-    """WebSocket endpoint for real-time conversation"""
+    """WebSocket endpoint for real-time conversation
+    
+    Frames are binary: UTF-8 JSON by default, or MessagePack maps with the same
+    keys when connecting with ?format=msgpack. Messages that queue up while a
+    send is in flight arrive together as {"batch": [message, ...]}.
+    """
     await websocket.accept()
-    connected_clients.append(websocket)
+    use_msgpack = websocket.query_params.get("format") == "msgpack"
+    encoder = msgpack_encoder if use_msgpack else frame_encoder
+    client = ClientConn(websocket, msgpack=use_msgpack)
+    async with clients_lock:
+        connected_clients.add(client)
     
     try:
-        while True:
+        # The sender task ends when the client disconnects
+        while not client.task.done():
             # Send heartbeat
-            await websocket.send_text(json.dumps({
+            client.send(encoder.encode({
                 "type": "heartbeat",
                 "timestamp": datetime.now().isoformat()
             }))
-            await asyncio.sleep(30)
+            await asyncio.wait({client.task}, timeout=30)
             
-    except WebSocketDisconnect:
-        connected_clients.remove(websocket)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        if websocket in connected_clients:
-            connected_clients.remove(websocket)
+    finally:
+        async with clients_lock:
+            connected_clients.discard(client)
+        client.close()
+
+@app.websocket("/ws/stt")
+async def websocket_speech_to_text(websocket: WebSocket):
+    """Streaming speech-to-text: 16 kHz mono 16-bit PCM frames in, Vosk JSON results out
+    
+    Each binary frame is answered with a partial or final result; send the text
+    message "eof" to flush the final transcript and close the stream.
+    """
+    if not german_engine.streaming_model:
+        await websocket.close(code=1013)
+        return
+    
+    from vosk import KaldiRecognizer
+    
+    await websocket.accept()
+    recognizer = KaldiRecognizer(german_engine.streaming_model, 16000)
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes") is not None:
+                # Decode in a worker thread so the next frame can be received meanwhile
+                final = await asyncio.to_thread(recognizer.AcceptWaveform, message["bytes"])
+                await websocket.send_text(recognizer.Result() if final else recognizer.PartialResult())
+            elif message.get("text") == "eof":
+                await websocket.send_text(recognizer.FinalResult())
+                await websocket.close()
+                break
+                
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Streaming STT error: {e}")
+
+# Circular spectrum layout: one log-spaced band per degree from 20Hz to 20kHz
+SPECTRUM_BINS = 360
+SPECTRUM_FRAME_SIZE = 4096
+SPECTRUM_EDGES_HZ = [20 * 1000 ** (i / SPECTRUM_BINS) for i in range(SPECTRUM_BINS + 1)]
+SPECTRUM_FREQUENCIES = [
+    (SPECTRUM_EDGES_HZ[i] * SPECTRUM_EDGES_HZ[i + 1]) ** 0.5 for i in range(SPECTRUM_BINS)
+]
+SPECTRUM_ANGLES = list(range(SPECTRUM_BINS))
+
+@njit(cache=True, fastmath=True)
+def bin_spectrum(magnitudes, edges, out):
+    """Average FFT magnitudes into bands; empty bands take their nearest bin"""
+    for i in range(out.size):
+        start = edges[i]
+        end = edges[i + 1]
+        if end <= start:
+            out[i] = magnitudes[start]
+            continue
+        total = 0.0
+        for j in range(start, end):
+            total += magnitudes[j]
+        out[i] = total / (end - start)
+
+def compute_spectrum(audio_data: bytes) -> Tuple[List[float], float]:
+    """FFT the last frame of an audio clip into SPECTRUM_BINS amplitudes (0-100)"""
+    samples, sample_rate = sf.read(io.BytesIO(audio_data), dtype="float32")
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    if len(samples) == 0:
+        raise ValueError("audio contains no samples")
+    duration = len(samples) / sample_rate
+    
+    frame = samples[-SPECTRUM_FRAME_SIZE:]
+    magnitudes = np.abs(np.fft.rfft(frame * np.hanning(len(frame)), n=SPECTRUM_FRAME_SIZE))
+    
+    # Map band edges onto FFT bins; bands above Nyquist land on the appended zero
+    edges = np.minimum(
+        (np.asarray(SPECTRUM_EDGES_HZ) * SPECTRUM_FRAME_SIZE / sample_rate).astype(np.int64),
+        len(magnitudes)
+    )
+    magnitudes = np.append(magnitudes, 0.0)
+    amplitudes = np.empty(SPECTRUM_BINS)
+    bin_spectrum(magnitudes, edges, amplitudes)
+    
+    peak = amplitudes.max()
+    if peak > 0:
+        amplitudes *= 100 / peak
+    return amplitudes.tolist(), duration
 
 @app.post("/audio/analyze")
 async def analyze_audio_spectrum(audio: UploadFile = File(...)):
@@ -469,25 +1193,23 @@ async def analyze_audio_spectrum(audio: UploadFile = File(...)):
     try:
         audio_data = await audio.read()
         
-        # Mock spectrum analysis (would need actual audio processing)
-        # This would normally use FFT to analyze frequencies
-        spectrum_data = []
-        for i in range(360):  # Circular spectrum (degrees)
-            # Mock frequency data
-            amplitude = np.random.random() * 100 if np.random.random() > 0.3 else 0
-            spectrum_data.append({
-                "angle": i,
-                "frequency": 20 + (i * 20000 / 360),  # 20Hz to 20kHz
-                "amplitude": amplitude,
-                "color": f"hsl({i}, 70%, 50%)"
-            })
+        try:
+            amplitudes, duration = await asyncio.to_thread(compute_spectrum, audio_data)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Could not decode audio: {e}")
         
+        # Parallel arrays per field; clients colour band i as hsl(i, 70%, 50%)
         return {
-            "spectrum": spectrum_data,
+            "angles": SPECTRUM_ANGLES,
+            "frequencies": SPECTRUM_FREQUENCIES,
+            "amplitudes": amplitudes,
+            "palette": "hsl-circular",
             "timestamp": datetime.now().isoformat(),
-            "duration": 1.0  # Mock duration
+            "duration": duration
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Audio analysis failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -542,11 +1264,7 @@ async def submit_idea(request: IdeaSubmissionRequest) -> IdeaResponse:
                     "timestamp": datetime.now().isoformat()
                 }
                 
-                for client in connected_clients[:]:
-                    try:
-                        await client.send_text(json.dumps(idea_message))
-                    except:
-                        connected_clients.remove(client)
+                await broadcast(idea_message)
                 
                 return IdeaResponse(
                     id=idea_id,
@@ -586,6 +1304,25 @@ async def submit_idea(request: IdeaSubmissionRequest) -> IdeaResponse:
         logger.error(f"Failed to submit idea: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/ideas/bulk")
+async def submit_ideas_bulk(requests: List[IdeaSubmissionRequest]):
+    """Store many ideas at once for later review, without AI processing"""
+    if len(requests) > MAX_BULK_IDEAS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_IDEAS} ideas per request")
+    try:
+        inserted = await db_manager.bulk_insert_ideas([
+            {
+                'original_prompt': request.idea_prompt,
+                'submitted_by': request.submitted_by,
+                'azure_processing_status': 'pending'
+            }
+            for request in requests
+        ])
+        return {"inserted": inserted}
+    except Exception as e:
+        logger.error(f"Failed to bulk submit ideas: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/ideas")
 async def get_ideas(limit: int = 50, status: Optional[str] = None):
     """Retrieve stored ideas"""
@@ -600,12 +1337,20 @@ async def get_ideas(limit: int = 50, status: Optional[str] = None):
         logger.error(f"Failed to retrieve ideas: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/ideas/stats")
+async def get_ideas_stats():
+    """Get statistics about submitted ideas"""
+    try:
+        return await db_manager.get_stats()
+    except Exception as e:
+        logger.error(f"Failed to generate ideas stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/ideas/{idea_id}")
 async def get_idea(idea_id: int):
     """Get a specific idea by ID"""
     try:
-        ideas = await db_manager.get_ideas(1, None)
-        idea = next((i for i in ideas if i['id'] == idea_id), None)
+        idea = await db_manager.get_idea_by_id(idea_id)
         
         if not idea:
             raise HTTPException(status_code=404, detail="Idea not found")
@@ -617,57 +1362,10 @@ async def get_idea(idea_id: int):
         logger.error(f"Failed to retrieve idea {idea_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/ideas/stats")
-async def get_ideas_stats():
-    """Get statistics about submitted ideas"""
-    try:
-        all_ideas = await db_manager.get_ideas(1000)  # Get more for stats
-        
-        stats = {
-            "total_ideas": len(all_ideas),
-            "by_status": {},
-            "by_category": {},
-            "by_complexity": {},
-            "average_complexity": 0,
-            "recent_submissions": 0
-        }
-        
-        # Calculate statistics
-        complexities = []
-        recent_cutoff = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        for idea in all_ideas:
-            # Status distribution
-            status = idea.get('status', 'unknown')
-            stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
-            
-            # Category distribution
-            category = idea.get('category', 'uncategorized')
-            stats["by_category"][category] = stats["by_category"].get(category, 0) + 1
-            
-            # Complexity distribution
-            complexity = idea.get('complexity', 3)
-            stats["by_complexity"][str(complexity)] = stats["by_complexity"].get(str(complexity), 0) + 1
-            complexities.append(complexity)
-            
-            # Recent submissions (today)
-            if idea.get('submission_date') and idea['submission_date'].date() >= recent_cutoff.date():
-                stats["recent_submissions"] += 1
-        
-        # Average complexity
-        if complexities:
-            stats["average_complexity"] = round(sum(complexities) / len(complexities), 2)
-        
-        return stats
-        
-    except Exception as e:
-        logger.error(f"Failed to generate ideas stats: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/capabilities")
-async def get_capabilities():
-    """Get JARVIS capabilities"""
-    return {
+@functools.lru_cache(maxsize=1)
+def capabilities_response() -> bytes:
+    """Serialized /capabilities body; rebuilt after clear_local_caches() re-checks the Azure AI config"""
+    return orjson.dumps({
         "languages": ["de", "en"],
         "features": {
             "speech_recognition": True,
@@ -692,7 +1390,9 @@ async def get_capabilities():
             "complexity_assessment": True,
             "claude_prompt_optimization": True
         }
-    }
+    })
 
-if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+@app.get("/capabilities")
+async def get_capabilities():
+    """Get JARVIS capabilities"""
+    return Response(content=capabilities_response(), media_type="application/json")
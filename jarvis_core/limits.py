@@ -0,0 +1,69 @@
+"""Container resource limits used to size uvicorn workers and Whisper threads"""
+import math
+import os
+from typing import Optional
+
+# Resident memory of one core worker: Whisper small (INT8), the Vosk German model,
+# fast-langdetect and the interpreter come to roughly 700 MB
+WORKER_MEMORY_BYTES = int(os.getenv('JARVIS_WORKER_MEMORY_MB', '768')) * 1024 * 1024
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def cgroup_cpu_quota() -> Optional[float]:
+    """CPUs allowed by the container's cgroup quota (e.g. compose `cpus: '2.0'`), or None"""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = _read('/sys/fs/cgroup/cpu.max')
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max':
+            try:
+                return int(quota) / int(period)
+            except ValueError:
+                pass
+        return None
+    # cgroup v1: a quota of -1 means unlimited
+    quota, period = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us'), _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+    try:
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    except ValueError:
+        pass
+    return None
+
+def cgroup_memory_limit() -> Optional[int]:
+    """Bytes allowed by the container's cgroup memory limit, or None if unlimited"""
+    value = _read('/sys/fs/cgroup/memory.max') or _read('/sys/fs/cgroup/memory/memory.limit_in_bytes')
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return None
+    # cgroup v1 reports "unlimited" as a number close to 2**63
+    return limit if limit < 1 << 60 else None
+
+def available_cpus() -> float:
+    """CPUs this process can actually use: the cgroup quota, capped by the affinity mask
+
+    os.cpu_count() reports the host's cores, which overstates the budget of a
+    CPU-limited container.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    return min(cpus, quota) if quota else cpus
+
+def worker_count() -> int:
+    """Number of uvicorn workers: JARVIS_WORKERS, or as many as the CPU and memory limits fit"""
+    if os.getenv('JARVIS_WORKERS'):
+        return int(os.getenv('JARVIS_WORKERS'))
+    workers = max(1, math.floor(available_cpus()))
+    memory = cgroup_memory_limit()
+    if memory:
+        workers = max(1, min(workers, memory // WORKER_MEMORY_BYTES))
+    return workers
@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 """JARVIS Core Main Entry Point"""
+from jarvis_core.limits import worker_count
 
 if __name__ == "__main__":
-    from jarvis_core.app import app
     import uvicorn
     
+    # Import string instead of the app object so uvicorn can spawn workers
     uvicorn.run(
-        app, 
+        "jarvis_core.app:app", 
         host="0.0.0.0", 
         port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        # Each worker loads its own speech models, so the default follows the container limits
+        workers=worker_count(),
         log_level="info",
         reload=False
-    )
\ No newline at end of file
+    )
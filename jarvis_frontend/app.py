@@ -1,107 +1,157 @@
 #!/usr/bin/env python3
 """JARVIS Frontend Application with German Conversation Interface"""
-from flask import Flask, render_template, jsonify, request, send_from_directory, send_file
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Request, UploadFile, File
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+import aiohttp
+import asyncio
 import os
-import io
 
-app = Flask(__name__, template_folder='templates', static_folder='static')
+CORE_URL = os.getenv('JARVIS_CORE_URL', 'http://jarvis-core:8000')
 
-@app.route('/')
-def index():
+# TTS streams for as long as synthesis runs, so only connect and per-read stalls time out
+TTS_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=10)
+STT_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# Connection failures (e.g. a keep-alive socket the core already closed) are retried
+CORE_RETRIES = 2
+
+# One keep-alive connection pool to jarvis-core per worker, opened in lifespan()
+http_session: Optional[aiohttp.ClientSession] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_session
+    connector = aiohttp.TCPConnector(
+        limit=int(os.getenv('CORE_POOL_SIZE', '64')),
+        keepalive_timeout=30
+    )
+    http_session = aiohttp.ClientSession(connector=connector)
+    yield
+    await http_session.close()
+
+async def post_to_core(path: str, timeout: aiohttp.ClientTimeout, make_body) -> aiohttp.ClientResponse:
+    """POST to jarvis-core over the shared pool, retrying connection failures with backoff
+
+    make_body() returns the request kwargs and is called per attempt, since an
+    upload body is consumed by the attempt that sends it.
+    """
+    for attempt in range(CORE_RETRIES + 1):
+        try:
+            return await http_session.post(f'{CORE_URL}{path}', timeout=timeout, **make_body())
+        except aiohttp.ClientConnectionError:
+            if attempt == CORE_RETRIES:
+                raise
+            await asyncio.sleep(0.1 * 2 ** attempt)
+
+app = FastAPI(title="JARVIS Frontend", lifespan=lifespan, default_response_class=ORJSONResponse)
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), 'templates'))
+
+@app.get('/')
+async def index(request: Request):
     """Main J.A.R.V.I.S interface"""
-    return render_template('index.html')
+    return templates.TemplateResponse('index.html', {'request': request})
 
-@app.route('/german-conversation')
-def german_conversation():
+@app.get('/german-conversation')
+async def german_conversation(request: Request):
     """German conversation interface with audio visualization"""
-    return render_template('german_conversation.html')
+    return templates.TemplateResponse('german_conversation.html', {'request': request})
 
-@app.route('/analytics')
-def analytics():
+@app.get('/analytics')
+async def analytics(request: Request):
     """Analytics and monitoring dashboard"""
-    return render_template('analytics.html')
+    return templates.TemplateResponse('analytics.html', {'request': request})
 
-@app.route('/settings')
-def settings():
+@app.get('/settings')
+async def settings(request: Request):
     """System settings and configuration"""
-    return render_template('settings.html')
+    return templates.TemplateResponse('settings.html', {'request': request})
 
-@app.route('/smart-home')
-def smart_home():
+@app.get('/smart-home')
+async def smart_home(request: Request):
     """Smart home control interface"""
-    return render_template('smart_home.html')
+    return templates.TemplateResponse('smart_home.html', {'request': request})
 
-@app.route('/meeting-notes')
-def meeting_notes():
+@app.get('/meeting-notes')
+async def meeting_notes(request: Request):
     """Meeting Notes Assistant with AI transcription"""
-    return render_template('meeting_notes.html')
+    return templates.TemplateResponse('meeting_notes.html', {'request': request})
 
-@app.route('/ideas')
-def ideas():
+@app.get('/ideas')
+async def ideas(request: Request):
     """Ideas Lab for submitting and managing new feature ideas"""
-    return render_template('ideas.html')
+    return templates.TemplateResponse('ideas.html', {'request': request})
 
-@app.route('/api/tts', methods=['POST'])
-def text_to_speech_proxy():
+@app.post('/api/tts')
+async def text_to_speech_proxy(request: Request):
     """Proxy TTS requests to core service"""
-    import requests
     try:
         # Forward request to core service
-        data = request.get_json()
-        response = requests.post('http://jarvis-core:8000/text-to-speech', 
-                               json=data, timeout=10)
-        
-        if response.status_code == 200:
-            return send_file(
-                io.BytesIO(response.content),
-                mimetype='audio/wav',
-                as_attachment=True,
-                download_name='speech.wav'
-            )
-        else:
-            return jsonify({'error': 'TTS service unavailable'}), 503
+        data = await request.json()
+        response = await post_to_core('/text-to-speech', TTS_TIMEOUT, lambda: {'json': data})
+
+        if response.status != 200:
+            response.release()
+            return JSONResponse({'error': 'TTS service unavailable'}, status_code=503)
+
+        # Relay audio chunks as they arrive instead of buffering the whole WAV
+        async def relay():
+            try:
+                async for chunk in response.content.iter_chunked(8192):
+                    yield chunk
+            finally:
+                response.release()
+
+        return StreamingResponse(
+            relay(),
+            media_type='audio/wav',
+            headers={'Content-Disposition': 'attachment; filename=speech.wav'}
+        )
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return JSONResponse({'error': str(e)}, status_code=500)
 
-@app.route('/api/stt', methods=['POST'])
-def speech_to_text_proxy():
+@app.post('/api/stt')
+async def speech_to_text_proxy(audio: Optional[UploadFile] = File(None)):
     """Proxy Speech-to-Text requests to core service"""
-    import requests
     try:
         # Handle file upload and forward to core service
-        if 'audio' not in request.files:
-            return jsonify({'error': 'No audio file provided'}), 400
-        
-        audio_file = request.files['audio']
-        files = {'audio': (audio_file.filename, audio_file, 'audio/wav')}
-        
-        response = requests.post('http://jarvis-core:8000/speech-to-text', 
-                               files=files, timeout=15)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return jsonify({'error': 'STT service unavailable'}), 503
+        if audio is None:
+            return JSONResponse({'error': 'No audio file provided'}, status_code=400)
+
+        def make_form():
+            audio.file.seek(0)
+            form = aiohttp.FormData()
+            form.add_field('audio', audio.file, filename=audio.filename, content_type='audio/wav')
+            return {'data': form}
+
+        async with await post_to_core('/speech-to-text', STT_TIMEOUT, make_form) as response:
+            if response.status == 200:
+                # Already JSON; pass it through without re-encoding
+                return Response(await response.read(), media_type='application/json')
+            else:
+                return JSONResponse({'error': 'STT service unavailable'}, status_code=503)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return JSONResponse({'error': str(e)}, status_code=500)
 
-@app.route('/api/status')
-def api_status():
+@app.get('/api/status')
+async def api_status():
     """API status endpoint"""
-    return jsonify({
-        "message": "JARVIS Frontend mit deutscher Konversation", 
+    return {
+        "message": "JARVIS Frontend mit deutscher Konversation",
         "status": "running",
         "features": ["German conversation", "Audio visualization", "Real-time chat"]
-    })
+    }
 
-@app.route('/health')
-def health():
-    return jsonify({"status": "healthy"})
+@app.get('/health')
+async def health():
+    return {"status": "healthy"}
 
 # Serve static files
-@app.route('/static/<path:filename>')
-def static_files(filename):
-    return send_from_directory('static', filename)
+app.mount('/static', StaticFiles(directory='static', check_dir=False), name='static')
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080, debug=True)
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=8080)
@@ -1,5 +1,14 @@
 # JARVIS Frontend Main Entry Point
-from jarvis_frontend.app import app
+import os
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8080, debug=True)
\ No newline at end of file
+    import uvicorn
+    
+    uvicorn.run(
+        "jarvis_frontend.app:app",
+        host="0.0.0.0",
+        port=8080,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv('JARVIS_FRONTEND_WORKERS', '4'))
+    )
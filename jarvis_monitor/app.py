@@ -5,10 +5,11 @@ Prometheus-based monitoring system for JARVIS multi-container environment
 """
 
 import os
+import threading
 import time
 import psutil
 import docker
-from flask import Flask, Response
+from flask import Flask, Response, request
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
 import logging
 from datetime import datetime
@@ -29,20 +30,46 @@ CONTAINER_CPU_USAGE = Gauge('jarvis_container_cpu_usage_percent', 'Container CPU
 CONTAINER_MEMORY_USAGE = Gauge('jarvis_container_memory_usage_bytes', 'Container memory usage', ['container_name'])
 CONTAINER_STATUS = Gauge('jarvis_container_status', 'Container status (1=running, 0=stopped)', ['container_name'])
 
+# Fallback core count for stats payloads without online_cpus
+CPU_COUNT = psutil.cpu_count() or 1
+
+def _compute_cpu_pct(stats) -> float:
+    """Container CPU usage from a Docker stats sample, 100 per fully used core"""
+    cpu_stats = stats['cpu_stats']
+    precpu_stats = stats['precpu_stats']
+    # The first sample of a stream has no previous reading to diff against
+    if not precpu_stats.get('system_cpu_usage'):
+        return 0.0
+    cpu_delta = cpu_stats['cpu_usage']['total_usage'] - precpu_stats['cpu_usage']['total_usage']
+    system_delta = cpu_stats['system_cpu_usage'] - precpu_stats['system_cpu_usage']
+    if system_delta <= 0:
+        return 0.0
+    # percpu_usage is deprecated and missing under cgroups v2; online_cpus is always reported there
+    return cpu_delta / system_delta * (cpu_stats.get('online_cpus') or CPU_COUNT) * 100
+
+# Seconds between background collections; scrapes read whatever was collected last
+COLLECTION_INTERVAL = int(os.getenv('METRICS_INTERVAL', '10'))
+
 class JarvisMonitor:
     def __init__(self):
         self.docker_client = None
+        # Latest raw stats sample per container, kept current by one streaming thread each
+        self.latest_stats = {}
+        self.stats_streams = {}
         try:
             self.docker_client = docker.from_env()
             logger.info("Docker client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Docker client: {e}")
+        
+        # Prime the CPU counters; later non-blocking calls report usage since the previous one
+        psutil.cpu_percent(interval=None)
     
     def collect_system_metrics(self):
         """Collect system-level metrics"""
         try:
             # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)
             SYSTEM_CPU_USAGE.set(cpu_percent)
             
             # Memory usage
@@ -64,7 +91,8 @@ class JarvisMonitor:
             return
             
         try:
-            containers = self.docker_client.containers.list(all=True)
+            # The daemon's name filter is a substring match, so the prefix is still checked
+            containers = self.docker_client.containers.list(all=True, filters={'name': 'jarvis-'})
             
             for container in containers:
                 if container.name.startswith('jarvis-'):
@@ -72,39 +100,68 @@ class JarvisMonitor:
                     status = 1 if container.status == 'running' else 0
                     CONTAINER_STATUS.labels(container_name=container.name).set(status)
                     
-                    if container.status == 'running':
-                        try:
-                            # Get container stats
-                            stats = container.stats(stream=False)
-                            
-                            # CPU usage calculation
-                            cpu_delta = stats['cpu_stats']['cpu_usage']['total_usage'] - \
-                                       stats['precpu_stats']['cpu_usage']['total_usage']
-                            system_delta = stats['cpu_stats']['system_cpu_usage'] - \
-                                          stats['precpu_stats']['system_cpu_usage']
-                            
-                            if system_delta > 0:
-                                cpu_percent = (cpu_delta / system_delta) * \
-                                            len(stats['cpu_stats']['cpu_usage']['percpu_usage']) * 100
-                                CONTAINER_CPU_USAGE.labels(container_name=container.name).set(cpu_percent)
-                            
-                            # Memory usage
-                            memory_usage = stats['memory_stats']['usage']
-                            CONTAINER_MEMORY_USAGE.labels(container_name=container.name).set(memory_usage)
-                            
-                        except Exception as e:
-                            logger.warning(f"Error getting stats for container {container.name}: {e}")
+                    # New or restarted containers get a stream; exited streams have removed themselves
+                    if container.status == 'running' and container.name not in self.stats_streams:
+                        self.start_stats_stream(container)
+            
+            for name, stats in list(self.latest_stats.items()):
+                try:
+                    self.record_container_stats(name, stats)
+                except Exception as e:
+                    logger.warning(f"Error getting stats for container {name}: {e}")
                             
         except Exception as e:
             logger.error(f"Error collecting container metrics: {e}")
     
+    def start_stats_stream(self, container):
+        """Follow a container's live stats stream on a daemon thread
+        
+        The daemon pushes a sample about once a second over a single connection,
+        instead of opening a connection and waiting for two samples per collection.
+        """
+        name = container.name
+        
+        def follow():
+            try:
+                for sample in container.stats(stream=True, decode=True):
+                    self.latest_stats[name] = sample
+            except Exception as e:
+                logger.warning(f"Stats stream for container {name} ended: {e}")
+            finally:
+                # The stream ends when the container stops; the next collection restarts it
+                self.latest_stats.pop(name, None)
+                self.stats_streams.pop(name, None)
+        
+        thread = threading.Thread(target=follow, name=f"stats-{name}", daemon=True)
+        self.stats_streams[name] = thread
+        thread.start()
+    
+    def record_container_stats(self, name, stats):
+        """Update the CPU and memory gauges from one Docker stats sample"""
+        # CPU usage; always set so an idle interval doesn't leave the previous value behind
+        CONTAINER_CPU_USAGE.labels(container_name=name).set(_compute_cpu_pct(stats))
+        
+        # Memory usage
+        memory_usage = stats['memory_stats']['usage']
+        CONTAINER_MEMORY_USAGE.labels(container_name=name).set(memory_usage)
+    
     def collect_all_metrics(self):
         """Collect all metrics"""
         self.collect_system_metrics()
         self.collect_container_metrics()
+    
+    def start_collection(self, interval: int = COLLECTION_INTERVAL):
+        """Collect metrics on a daemon thread so /metrics never waits on Docker or psutil"""
+        def collection_loop():
+            while True:
+                self.collect_all_metrics()
+                time.sleep(interval)
+        
+        threading.Thread(target=collection_loop, name="metrics-collector", daemon=True).start()
 
 # Initialize monitor
 monitor = JarvisMonitor()
+monitor.start_collection()
 
 @app.before_request
 def before_request():
@@ -114,7 +171,6 @@ def before_request():
 def metrics():
     """Prometheus metrics endpoint"""
     with REQUEST_DURATION.time():
-        monitor.collect_all_metrics()
         return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
 
 @app.route('/health')
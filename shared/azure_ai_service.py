@@ -3,16 +3,128 @@ Azure AI Service Integration for JARVIS
 Handles AI-powered idea processing and enhancement
 """
 import asyncio
+import functools
 import json
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import aiohttp
+import orjson
 import os
 from dataclasses import dataclass
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
 logger = logging.getLogger(__name__)
 
+# Parses one JSON value at an offset and reports where it ended, ignoring trailing text
+_JSON_DECODER = json.JSONDecoder()
+
+# One keep-alive HTTPS session per process, so ideas don't each pay a TLS handshake
+_SESSION: Optional[aiohttp.ClientSession] = None
+_SESSION_LOCK = asyncio.Lock()
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared Azure AI session, creating it on first use"""
+    global _SESSION
+    async with _SESSION_LOCK:
+        if _SESSION is None or _SESSION.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100, limit_per_host=32, keepalive_timeout=75, ttl_dns_cache=300
+            )
+            _SESSION = aiohttp.ClientSession(connector=connector)
+        return _SESSION
+
+async def close_session():
+    """Close the shared Azure AI session; call on application shutdown"""
+    global _SESSION
+    if _SESSION is not None:
+        await _SESSION.close()
+        _SESSION = None
+
+# Fields an AI response must contain to be usable
+_REQUIRED_FIELDS = frozenset({'title', 'bullet_points', 'detailed_concept', 'optimized_prompt'})
+
+# Caps in-flight Azure AI calls per process so bursts queue here instead of hitting the quota
+_AZURE_SEM = asyncio.Semaphore(int(os.getenv('AZURE_MAX_CONCURRENCY', '8')))
+_BACKOFF = wait_exponential_jitter(initial=1, max=20)
+
+class AzureAIRetryableError(Exception):
+    """Azure AI answered 429 or 503; carries the Retry-After hint when one was sent"""
+    
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"Azure AI API error {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds; the HTTP-date form is ignored in favour of backoff"""
+    try:
+        return min(float(value), 60.0)
+    except (TypeError, ValueError):
+        return None
+
+def _wait_for_retry(retry_state) -> float:
+    """Honour the server's Retry-After, otherwise back off exponentially with jitter"""
+    error = retry_state.outcome.exception()
+    if isinstance(error, AzureAIRetryableError) and error.retry_after is not None:
+        return error.retry_after
+    return _BACKOFF(retry_state)
+
+# Prompt text is constant; built once here instead of per idea
+_SYSTEM_PROMPT = """You are an expert AI system designer and software architect for JARVIS, a sophisticated multi-container AI development environment. Your task is to analyze user-submitted ideas for new capabilities or features and enhance them with detailed specifications.
+
+For each idea, you must generate:
+1. A compelling, clear title (max 100 characters)
+2. Three bullet points describing the feature for a preview tile (each max 80 characters)
+3. A detailed concept document with technical specifications
+4. An optimized prompt for Claude Code to implement the feature
+5. Categorization, complexity assessment, and implementation guidance
+
+Focus on:
+- Technical feasibility within the JARVIS architecture
+- Integration with existing microservices (core, functions, test, code, monitor, android)
+- Security and performance considerations
+- User experience and practical value
+- Clear implementation steps
+
+The JARVIS system uses:
+- Docker microservices architecture
+- PostgreSQL databases (persons, organization, medical, trading)
+- ChromaDB for vector embeddings
+- Redis for caching
+- AutoGen for multi-agent AI workflows
+- Claude Code integration
+- Android automation capabilities
+- Prometheus monitoring
+
+Respond in valid JSON format with the specified structure."""
+
+_SYSTEM_MSG = {'role': 'system', 'content': _SYSTEM_PROMPT}
+
+_USER_PROMPT_PREFIX = """Please analyze and enhance this idea for a new JARVIS capability:
+
+Original idea: """
+
+_USER_PROMPT_SUFFIX = """
+
+Generate a JSON response with this exact structure:
+{
+    "title": "Clear, compelling title for the feature",
+    "bullet_points": [
+        "First benefit/feature description",
+        "Second key capability", 
+        "Third advantage or use case"
+    ],
+    "detailed_concept": "Comprehensive technical specification including architecture, implementation approach, integration points, security considerations, and user workflow. Should be detailed enough for a senior developer to understand the full scope.",
+    "optimized_prompt": "A carefully crafted prompt for Claude Code that includes: specific technical requirements, architectural constraints, integration points, security requirements, testing approach, and step-by-step implementation guidance. This prompt should enable Claude Code to implement the feature effectively.",
+    "category": "Primary category (automation|ai|integration|ui|security|data|monitoring|testing|android|development)",
+    "complexity": 1-5,
+    "tags": ["relevant", "searchable", "tags"],
+    "requirements_notes": "Key requirements, dependencies, and constraints for implementation"
+}
+
+Ensure the response is valid JSON and follows JARVIS system architecture principles."""
+
 @dataclass
 class IdeaEnhancement:
     """Data class for AI-enhanced idea information"""
@@ -33,7 +145,6 @@ class AzureAIService:
         self.endpoint = os.getenv('AZURE_AI_ENDPOINT', 'https://jarvis-ai.openai.azure.com/')
         self.api_version = os.getenv('AZURE_AI_API_VERSION', '2024-02-15-preview')
         self.deployment_name = os.getenv('AZURE_AI_DEPLOYMENT', 'gpt-4')
-        self.session = None
         
     def _load_azure_api_key(self) -> str:
         """Load Azure AI API key from environment variable"""
@@ -45,14 +156,12 @@ class AzureAIService:
             return ''
     
     async def __aenter__(self):
-        """Async context manager entry"""
-        self.session = aiohttp.ClientSession()
+        """Async context manager entry; connections come from the shared session"""
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit; the shared session stays open for reuse"""
+        pass
     
     async def process_idea(self, original_prompt: str, user_context: Optional[str] = None) -> IdeaEnhancement:
         """
@@ -66,14 +175,11 @@ class AzureAIService:
             IdeaEnhancement object with AI-generated content
         """
         try:
-            # Create the system prompt for idea enhancement
-            system_prompt = self._create_system_prompt()
-            
             # Create the user prompt with the idea
             user_prompt = self._create_user_prompt(original_prompt, user_context)
             
             # Make the API call to Azure AI
-            response = await self._call_azure_ai(system_prompt, user_prompt)
+            response = await self._call_azure_ai(user_prompt)
             
             # Parse and validate the response
             enhancement = self._parse_ai_response(response)
@@ -86,63 +192,19 @@ class AzureAIService:
             # Return a basic enhancement as fallback
             return self._create_fallback_enhancement(original_prompt)
     
-    def _create_system_prompt(self) -> str:
-        """Create the system prompt for Azure AI"""
-        return """You are an expert AI system designer and software architect for JARVIS, a sophisticated multi-container AI development environment. Your task is to analyze user-submitted ideas for new capabilities or features and enhance them with detailed specifications.
-
-For each idea, you must generate:
-1. A compelling, clear title (max 100 characters)
-2. Three bullet points describing the feature for a preview tile (each max 80 characters)
-3. A detailed concept document with technical specifications
-4. An optimized prompt for Claude Code to implement the feature
-5. Categorization, complexity assessment, and implementation guidance
-
-Focus on:
-- Technical feasibility within the JARVIS architecture
-- Integration with existing microservices (core, functions, test, code, monitor, android)
-- Security and performance considerations
-- User experience and practical value
-- Clear implementation steps
-
-The JARVIS system uses:
-- Docker microservices architecture
-- PostgreSQL databases (persons, organization, medical, trading)
-- ChromaDB for vector embeddings
-- Redis for caching
-- AutoGen for multi-agent AI workflows
-- Claude Code integration
-- Android automation capabilities
-- Prometheus monitoring
-
-Respond in valid JSON format with the specified structure."""
-
     def _create_user_prompt(self, original_prompt: str, user_context: Optional[str] = None) -> str:
         """Create the user prompt with the idea"""
         context_info = f"\nUser context: {user_context}" if user_context else ""
         
-        return f"""Please analyze and enhance this idea for a new JARVIS capability:
+        return f"{_USER_PROMPT_PREFIX}{original_prompt}{context_info}{_USER_PROMPT_SUFFIX}"
 
-Original idea: {original_prompt}{context_info}
-
-Generate a JSON response with this exact structure:
-{{
-    "title": "Clear, compelling title for the feature",
-    "bullet_points": [
-        "First benefit/feature description",
-        "Second key capability", 
-        "Third advantage or use case"
-    ],
-    "detailed_concept": "Comprehensive technical specification including architecture, implementation approach, integration points, security considerations, and user workflow. Should be detailed enough for a senior developer to understand the full scope.",
-    "optimized_prompt": "A carefully crafted prompt for Claude Code that includes: specific technical requirements, architectural constraints, integration points, security requirements, testing approach, and step-by-step implementation guidance. This prompt should enable Claude Code to implement the feature effectively.",
-    "category": "Primary category (automation|ai|integration|ui|security|data|monitoring|testing|android|development)",
-    "complexity": 1-5,
-    "tags": ["relevant", "searchable", "tags"],
-    "requirements_notes": "Key requirements, dependencies, and constraints for implementation"
-}}
-
-Ensure the response is valid JSON and follows JARVIS system architecture principles."""
-
-    async def _call_azure_ai(self, system_prompt: str, user_prompt: str) -> Dict:
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=_wait_for_retry,
+        retry=retry_if_exception_type(AzureAIRetryableError),
+        reraise=True
+    )
+    async def _call_azure_ai(self, user_prompt: str) -> Dict:
         """Make API call to Azure AI"""
         if not self.api_key:
             raise ValueError("Azure AI API key not configured")
@@ -155,10 +217,7 @@ Ensure the response is valid JSON and follows JARVIS system architecture princip
         }
         
         payload = {
-            'messages': [
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': user_prompt}
-            ],
+            'messages': [_SYSTEM_MSG, {'role': 'user', 'content': user_prompt}],
             'max_tokens': 2000,
             'temperature': 0.7,
             'top_p': 0.9,
@@ -166,43 +225,56 @@ Ensure the response is valid JSON and follows JARVIS system architecture princip
             'presence_penalty': 0.1
         }
         
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-        
-        async with self.session.post(url, headers=headers, json=payload) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                raise Exception(f"Azure AI API error {response.status}: {error_text}")
-            
-            result = await response.json()
-            return result
+        session = await get_session()
+        # Released between retries, so a throttled call doesn't hold a slot while it waits
+        async with _AZURE_SEM:
+            async with session.post(url, headers=headers, json=payload) as response:
+                if response.status in (429, 503):
+                    raise AzureAIRetryableError(
+                        response.status, await response.text(),
+                        _parse_retry_after(response.headers.get('Retry-After'))
+                    )
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Azure AI API error {response.status}: {error_text}")
+                
+                return orjson.loads(await response.read())
     
     def _parse_ai_response(self, response: Dict) -> IdeaEnhancement:
         """Parse Azure AI response and create IdeaEnhancement object"""
         try:
             content = response['choices'][0]['message']['content']
             
-            # Extract JSON from the response (handle potential markdown formatting)
+            # Extract the first JSON object from the response (handles markdown fences
+            # and commentary around it); a brace that doesn't start valid JSON is skipped
             json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            
-            if json_start == -1 or json_end == 0:
+            while json_start != -1:
+                try:
+                    parsed, _ = _JSON_DECODER.raw_decode(content, json_start)
+                    if isinstance(parsed, dict):
+                        break
+                except ValueError:
+                    pass
+                json_start = content.find('{', json_start + 1)
+            else:
                 raise ValueError("No JSON found in AI response")
             
-            json_content = content[json_start:json_end]
-            parsed = json.loads(json_content)
-            
             # Validate required fields
-            required_fields = ['title', 'bullet_points', 'detailed_concept', 'optimized_prompt']
-            for field in required_fields:
-                if field not in parsed:
-                    raise ValueError(f"Missing required field: {field}")
+            missing = _REQUIRED_FIELDS - parsed.keys()
+            if missing:
+                raise ValueError(f"Missing required field: {', '.join(sorted(missing))}")
             
             # Ensure bullet_points has exactly 3 items
             bullet_points = parsed['bullet_points']
-            if len(bullet_points) != 3:
-                # Pad or trim to exactly 3 items
-                bullet_points = (bullet_points + ['', '', ''])[:3]
+            count = len(bullet_points)
+            if count > 3:
+                bullet_points = bullet_points[:3]
+            elif count < 3:
+                bullet_points = bullet_points + [''] * (3 - count)
+            
+            # Clamp to the 1-5 range
+            complexity = parsed.get('complexity', 3)
+            complexity = 1 if complexity < 1 else 5 if complexity > 5 else complexity
             
             return IdeaEnhancement(
                 title=parsed['title'][:500],  # Ensure max length
@@ -210,7 +282,7 @@ Ensure the response is valid JSON and follows JARVIS system architecture princip
                 detailed_concept=parsed['detailed_concept'],
                 optimized_prompt=parsed['optimized_prompt'],
                 category=parsed.get('category', 'development'),
-                complexity=max(1, min(5, parsed.get('complexity', 3))),  # Ensure 1-5 range
+                complexity=complexity,
                 tags=parsed.get('tags', []),
                 requirements_notes=parsed.get('requirements_notes', '')
             )
@@ -242,8 +314,9 @@ async def process_idea_with_azure_ai(original_prompt: str, user_context: Optiona
     async with AzureAIService() as ai_service:
         return await ai_service.process_idea(original_prompt, user_context)
 
+@functools.lru_cache(maxsize=1)
 def validate_azure_ai_config() -> bool:
-    """Check if Azure AI is properly configured"""
+    """Check if Azure AI is properly configured (cached; call cache_clear() after changing the environment)"""
     try:
         service = AzureAIService()
         return bool(service.api_key and service.endpoint)
@@ -6,26 +6,28 @@ Pytest configuration and shared fixtures for JARVIS test suite
 import pytest
 import asyncio
 import os
+import sys
 import tempfile
 import json
 from pathlib import Path
 from unittest.mock import Mock, patch
-import docker
-import chromadb
-from chromadb.config import Settings
 
-# Test environment setup
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+# Services import shared/ modules by name, as they are mounted at /app/shared in the containers
+sys.path.append(str(Path(__file__).resolve().parent.parent / "shared"))
+
+# Run async tests on uvloop, as the services do in production
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
 
 @pytest.fixture(scope="session")
 def docker_client():
     """Docker client for container testing"""
     try:
+        # Imported here so test runs that never touch Docker don't pay for it
+        import docker
         client = docker.from_env()
         yield client
     except Exception:
@@ -68,6 +70,7 @@ def test_config():
 @pytest.fixture
 def mock_chroma_client():
     """Mock ChromaDB client for testing"""
+    # patch() imports chromadb by name, so only tests using this fixture load it
     with patch('chromadb.Client') as mock_client:
         mock_instance = Mock()
         mock_client.return_value = mock_instance
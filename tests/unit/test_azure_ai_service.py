@@ -0,0 +1,86 @@
+"""
+Unit tests for the Azure AI idea enhancement service
+Tests parsing and normalisation of the model's JSON answer
+"""
+
+import json
+import pytest
+
+from azure_ai_service import AzureAIService
+
+def ai_response(content):
+    """Chat completion payload wrapping the given message content"""
+    return {'choices': [{'message': {'content': content}}]}
+
+def idea_json(**overrides):
+    """A complete enhancement object with optional field overrides"""
+    idea = {
+        "title": "Voice reminders",
+        "bullet_points": ["One", "Two", "Three"],
+        "detailed_concept": "Concept",
+        "optimized_prompt": "Prompt",
+        "category": "automation",
+        "complexity": 3,
+        "tags": ["voice"],
+        "requirements_notes": "Notes"
+    }
+    idea.update(overrides)
+    return json.dumps(idea)
+
+@pytest.mark.unit
+class TestParseAIResponse:
+    """Test AzureAIService._parse_ai_response"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.service = AzureAIService()
+    
+    def test_json_in_markdown_fence(self):
+        """Test that a JSON object wrapped in a markdown fence and commentary is found"""
+        content = f"Here is the analysis:\n```json\n{idea_json()}\n```\nLet me know if you need more."
+        
+        enhancement = self.service._parse_ai_response(ai_response(content))
+        
+        assert enhancement.title == "Voice reminders"
+        assert enhancement.category == "automation"
+    
+    def test_stray_brace_before_json(self):
+        """Test that a brace which doesn't start valid JSON is skipped"""
+        content = f"Use {{placeholders}} like this:\n{idea_json()}"
+        
+        enhancement = self.service._parse_ai_response(ai_response(content))
+        
+        assert enhancement.title == "Voice reminders"
+    
+    def test_missing_required_fields(self):
+        """Test that an answer without required fields is rejected"""
+        content = json.dumps({"title": "Only a title", "bullet_points": []})
+        
+        with pytest.raises(ValueError, match="detailed_concept, optimized_prompt"):
+            self.service._parse_ai_response(ai_response(content))
+    
+    def test_no_json(self):
+        """Test that an answer without any JSON object is rejected"""
+        with pytest.raises(ValueError, match="No JSON found"):
+            self.service._parse_ai_response(ai_response("Sorry, I can't help with that."))
+    
+    @pytest.mark.parametrize("bullets, expected", [
+        (["One", "Two"], ["One", "Two", ""]),
+        (["One", "Two", "Three", "Four", "Five"], ["One", "Two", "Three"])
+    ])
+    def test_bullet_points_normalised_to_three(self, bullets, expected):
+        """Test that bullet points are padded or truncated to exactly three"""
+        content = idea_json(bullet_points=bullets)
+        
+        enhancement = self.service._parse_ai_response(ai_response(content))
+        
+        assert enhancement.bullet_points == expected
+    
+    @pytest.mark.parametrize("complexity, expected", [(0, 1), (9, 5), (4, 4)])
+    def test_complexity_clamped(self, complexity, expected):
+        """Test that complexity is clamped to the 1-5 range"""
+        content = idea_json(complexity=complexity)
+        
+        enhancement = self.service._parse_ai_response(ai_response(content))
+        
+        assert enhancement.complexity == expected
@@ -5,7 +5,9 @@ Tests the main orchestration and API functionality
 
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, AsyncMock
+import importlib
+import os
+from unittest.mock import Mock, MagicMock, patch, AsyncMock
 from fastapi.testclient import TestClient
 
 # Import core service components
@@ -256,5 +258,138 @@ class TestAPIEndpoints:
             assert response["skills_loaded"] == 22
             assert all(status == "connected" for status in response["services"].values())
 
+@pytest.fixture(scope="module")
+def core_module(tmp_path_factory):
+    """The real jarvis_core.app module, with its TTS cache in a temp directory"""
+    os.environ.setdefault("TTS_CACHE_DIR", str(tmp_path_factory.mktemp("tts-cache")))
+    return importlib.import_module("jarvis_core.app")
+
+def mock_pool(conn):
+    """asyncpg-style pool whose acquire() context yields the given connection"""
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = conn
+    return pool
+
+@pytest.mark.unit
+class TestIdeasEndpoints:
+    """Test the ideas API against a mocked database pool"""
+    
+    def test_get_idea_by_id(self, core_module):
+        """Test that any stored idea is found by id, not only the newest ones"""
+        rows = {1: {"id": 1, "generated_title": "Oldest"}, 2: {"id": 2, "generated_title": "Newest"}}
+        conn = Mock()
+        conn.fetchrow = AsyncMock(side_effect=lambda query, idea_id: rows.get(idea_id))
+        
+        with patch.object(core_module.db_manager, "pool", mock_pool(conn)):
+            client = TestClient(core_module.app)
+            response = client.get("/ideas/1")
+            missing = client.get("/ideas/99")
+        
+        assert response.status_code == 200
+        assert response.json() == rows[1]
+        assert "WHERE id = $1" in conn.fetchrow.call_args_list[0].args[0]
+        assert missing.status_code == 404
+    
+    def test_ideas_stats(self, core_module):
+        """Test that /ideas/stats isn't captured by /ideas/{idea_id} and maps each grouping set"""
+        conn = Mock()
+        conn.fetchrow = AsyncMock(return_value={
+            "total_ideas": 3, "average_complexity": 2.33, "recent_submissions": 1
+        })
+        conn.fetch = AsyncMock(return_value=[
+            {"status": "pending", "category": None, "complexity": None, "count": 2},
+            {"status": "completed", "category": None, "complexity": None, "count": 1},
+            {"status": None, "category": "ai", "complexity": None, "count": 3},
+            {"status": None, "category": None, "complexity": 2, "count": 2},
+            {"status": None, "category": None, "complexity": 3, "count": 1}
+        ])
+        
+        with patch.object(core_module.db_manager, "pool", mock_pool(conn)):
+            response = TestClient(core_module.app).get("/ideas/stats")
+        
+        assert response.status_code == 200
+        assert response.json() == {
+            "total_ideas": 3,
+            "by_status": {"pending": 2, "completed": 1},
+            "by_category": {"ai": 3},
+            "by_complexity": {"2": 2, "3": 1},
+            "average_complexity": 2.33,
+            "recent_submissions": 1
+        }
+
+@pytest.mark.unit
+class TestRedisFallback:
+    """Test that Redis outages degrade to per-worker state instead of failing requests"""
+    
+    def test_conversation_survives_redis_errors(self, core_module):
+        """Test that /conversation answers and keeps history locally when Redis fails"""
+        redis = MagicMock()
+        redis.pipeline.side_effect = core_module.RedisError("connection refused")
+        redis.publish = AsyncMock(side_effect=core_module.RedisError("connection refused"))
+        redis.lrange = AsyncMock(side_effect=core_module.RedisError("connection refused"))
+        
+        with patch.object(core_module, "redis_client", redis), \
+                patch.object(core_module, "send_to_clients") as send_to_clients:
+            client = TestClient(core_module.app)
+            response = client.post("/conversation", json={"message": "Hallo", "session_id": "redis-down"})
+            history = client.get("/conversations/redis-down")
+        
+        assert response.status_code == 200
+        send_to_clients.assert_called_once()
+        assert history.status_code == 200
+        assert history.json()["messages"][0]["user_message"] == "Hallo"
+
+@pytest.mark.unit
+class TestCapabilities:
+    """Test the /capabilities endpoint"""
+    
+    def test_capabilities_follow_cache_clear(self, core_module, monkeypatch):
+        """Test that clearing the caches re-checks the Azure AI configuration"""
+        client = TestClient(core_module.app)
+        monkeypatch.setenv("AZURE_AI_API_KEY", "")
+        core_module.clear_local_caches()
+        assert client.get("/capabilities").json()["features"]["ai_enhancement"] is False
+        
+        monkeypatch.setenv("AZURE_AI_API_KEY", "test-key")
+        assert client.get("/capabilities").json()["features"]["ai_enhancement"] is False
+        
+        core_module.clear_local_caches()
+        capabilities = client.get("/capabilities").json()
+        assert capabilities["features"]["ai_enhancement"] is True
+        assert capabilities["idea_features"]["ai_processing"] is True
+        core_module.clear_local_caches()
+
+@pytest.mark.unit
+class TestGermanIntents:
+    """Test keyword intent classification in process_german_text"""
+    
+    @pytest.mark.parametrize("text, intent", [
+        ("Hallo JARVIS", "greeting"),
+        ("Tschüss, bis bald", "goodbye"),
+        ("Was kannst du alles?", "help"),
+        ("Wie   geht es dir?", "wellbeing"),
+        ("Welcher Tag ist heute?", "date"),
+        # The keyword that appears first wins, whichever intent it belongs to
+        ("Hallo, wie spät ist es?", "greeting"),
+        ("Wie spät ist es? Hallo", "time"),
+        ("Hilfe, auf Wiedersehen", "help"),
+        # Keywords only match whole words
+        ("Das war sehr hilfreich", "unknown"),
+        ("Chillen im Park", "unknown")
+    ])
+    def test_intent_matching(self, core_module, text, intent):
+        """Test that the leftmost whole-word keyword decides the intent"""
+        match = core_module.INTENT_RE.search(text)
+        
+        assert (match.lastgroup if match else "unknown") == intent
+    
+    def test_intent_responses(self, core_module):
+        """Test the responses chosen for matched and unmatched messages"""
+        engine = core_module.german_engine
+        
+        assert engine.process_german_text("Hallo") == core_module.JARVIS_RESPONSES_DE["greeting"][0]
+        assert engine.process_german_text("Wie spät ist es?").startswith("Es ist jetzt")
+        assert engine.process_german_text("Blumenkohl") == core_module.JARVIS_RESPONSES_DE["unknown"][0]
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file